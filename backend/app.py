@@ -1,13 +1,25 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import pandas as pd
 import requests
-import msgpack
 import json
+import hashlib
+import io
+import logging
+import os
 import fitz  # PyMuPDF
 from sentence_transformers import SentenceTransformer
 
-from backend.db import init_db, apply_job, get_applied_jobs, delete_applied_job
+from backend.db import init_db, apply_job, get_applied_jobs, delete_applied_job, get_index_versions
+from backend.embedding_service import EmbeddingClient, EmbeddingOverloaded
+from backend.dedup import collapse_near_duplicates
+from backend.resume_cache import init_resume_cache, resume_fingerprint, get_cached_resume, cache_resume
+from backend.pagination import CursorCache, paginate, parse_cursor
+from backend.responses import JobHit, parse_fields, project, jobs_response
+from backend.sharding import load_shard_map, search_shards
+from backend.reindex import active_version, start_reindex, job_status
 
 # ==========================
 # CONFIG
@@ -19,31 +31,176 @@ INDEX_NAME = "jobs_index"
 OLLAMA_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "llama3.2"
 
+# ✅ Set to "host:port" to use the shared embedding service instead of a local model
+EMBEDDING_SERVICE_ADDR = os.getenv("EMBEDDING_SERVICE_ADDR")
+EMBEDDING_SERVICE_KEY = os.getenv("EMBEDDING_SERVICE_KEY", "job-ai-embeddings")
+
+# ✅ Candidates fetched on the first page, deeper pages are served from cache
+CANDIDATE_K = 50
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+FINGERPRINT_HEADER = "X-Resume-Fingerprint"
+# ✅ Set when some shards failed and results only cover the others
+SHARD_ERRORS_HEADER = "X-Shard-Errors"
+
+FACET_COLUMNS = ["location", "experience", "company"]
+
+# ✅ Only gzip responses bigger than this (k=50 result lists)
+GZIP_MIN_BYTES = 1024
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Job AI Search API", version="2.0.0")
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+
+# ✅ Shard layout comes from shards.json (SHARD_CONFIG), default = one index
+shard_map = load_shard_map(endee_url=ENDEE_URL, index_name=INDEX_NAME)
 
 # ==========================
 # ✅ Lazy Globals
 # ==========================
 df = None
+jobs_by_id = None
 model = None
+catalog_version = None
+facets = None
+served_index_version = None
 
 # ✅ Init DB once
 init_db()
+init_resume_cache()
+
+# ✅ Candidate lists behind pagination cursors
+cursor_cache = CursorCache()
+
+
+def build_facets(catalog):
+    """Distinct values + counts for the filter dropdowns"""
+    out = {}
+    for column in FACET_COLUMNS:
+        counts = catalog[column].astype(str).value_counts()
+        out[column] = [
+            {"value": value, "count": int(count)}
+            for value, count in sorted(counts.items())
+        ]
+    return out
+
+
+def read_catalog():
+    """Reads + normalizes the CSV, returns (df, content hash)"""
+    with open(CSV_PATH, "rb") as f:
+        raw = f.read()
+
+    catalog = pd.read_csv(io.BytesIO(raw))
+
+    # ✅ Normalize important filter columns
+    catalog["location"] = catalog["location"].astype(str).str.strip().str.title()
+    catalog["experience"] = catalog["experience"].astype(str).str.strip()
+
+    return catalog, hashlib.sha1(raw).hexdigest()[:16]
+
+
+def load_catalog():
+    """Loads CSV + precomputed facets (no embedding model)"""
+    global df, jobs_by_id, catalog_version, facets, served_index_version
+
+    # ✅ Reload when a re-index went live (maybe in another worker)
+    version = active_version()
+    if df is not None and version == served_index_version:
+        return
+
+    catalog, content_hash = read_catalog()
+    catalog_facets = build_facets(catalog)
+    # ✅ O(1) row lookup per hit instead of a DataFrame scan
+    catalog_jobs = {int(row["job_id"]): row for row in catalog.to_dict("records")}
+
+    # ✅ Swap all at once, concurrent requests never see a half-loaded catalog
+    # (catalog version = content hash, used as ETag)
+    df, jobs_by_id, catalog_version, facets, served_index_version = (
+        catalog, catalog_jobs, content_hash, catalog_facets, version
+    )
+
+
+def live_shards():
+    """Shard layout of the active index version"""
+    return shard_map.versioned(active_version())
+
+
+def load_model():
+    """Embedding model, or a client for the shared embedding service"""
+    global model
+
+    if model is None:
+        if EMBEDDING_SERVICE_ADDR:
+            model = EmbeddingClient(EMBEDDING_SERVICE_ADDR, EMBEDDING_SERVICE_KEY)
+        else:
+            model = SentenceTransformer("all-MiniLM-L6-v2")
+
+    return model
 
 
 def load_resources():
     """Loads CSV + embedding model only when needed"""
-    global df, model
+    load_catalog()
+    load_model()
 
-    if df is None:
-        df = pd.read_csv(CSV_PATH)
 
-        # ✅ Normalize important filter columns
-        df["location"] = df["location"].astype(str).str.strip().str.title()
-        df["experience"] = df["experience"].astype(str).str.strip()
+def job_hits(data):
+    """Turns Endee search results into job dicts (skips unknown job_ids)"""
+    results = []
+    for item in data:
+        # ✅ Endee may return: [score, id] OR [score, id, meta/filter...]
+        score = float(item[0])
+        job_id = int(item[1])
+
+        job = jobs_by_id.get(job_id)
+        if job is None:
+            continue
+
+        results.append(
+            {
+                "job_id": job_id,
+                "title": str(job["title"]),
+                "company": str(job["company"]),
+                "location": str(job["location"]),
+                "skills": str(job["skills"]),
+                "experience": str(job["experience"]),
+                "description": str(job["description"]),
+                "score": score,
+            }
+        )
+
+    return results
+
+
+def cached_page(cursor: str, k: int, fields=None):
+    """Serves a deeper page from the candidate list behind a cursor"""
+    parsed = parse_cursor(cursor)
+    candidates = cursor_cache.get(parsed[0]) if parsed else None
+    if candidates is None:
+        return {"error": "Cursor expired or invalid, run the search again"}
+
+    key, offset = parsed
+    page, next_cursor = paginate(cursor_cache, candidates, int(k), offset, key)
+    return jobs_response(page, fields, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
 
-    if model is None:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+
+def shard_error_headers(errors: list):
+    """Logs failed shards and names them in a header for partial results"""
+    if not errors:
+        return {}
+
+    logger.warning("Partial search result, failed shards: %s", errors)
+    return {SHARD_ERRORS_HEADER: ",".join(e.split(":", 1)[0] for e in errors)}
+
+
+def first_page(candidates: list, k: int, fields=None, headers=None):
+    page, next_cursor = paginate(cursor_cache, candidates, int(k))
+
+    headers = dict(headers or {})
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return jobs_response(page, fields, headers)
 
 
 # ==========================
@@ -54,75 +211,108 @@ def home():
     return {"message": "✅ Job AI API running"}
 
 
+def conditional(request: Request, response: Response, etag: str, body):
+    """Returns 304 if the client already has this ETag, else body + ETag"""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return body
+
+
+# ✅ Also covers EmbeddingTimeout (subclass): both mean "retry later"
+@app.exception_handler(EmbeddingOverloaded)
+def embedding_overloaded(request: Request, exc: EmbeddingOverloaded):
+    return JSONResponse(status_code=503, content={"error": str(exc)})
+
+
+# ==========================
+# EMBEDDING SERVICE METRICS
+# ==========================
+@app.get("/embedding/metrics")
+def embedding_metrics():
+    # ✅ Local mode has nothing to report, don't load the CSV or the model for it
+    if not EMBEDDING_SERVICE_ADDR:
+        return {"mode": "local"}
+
+    return {"mode": "service", **load_model().metrics()}
+
+
+# ==========================
+# FACETS (FILTER DROPDOWNS)
+# ==========================
+@app.get("/facets")
+def get_facets(request: Request, response: Response):
+    load_catalog()
+
+    body = {"version": catalog_version, "total": int(len(df)), "facets": facets}
+    return conditional(request, response, f'"{catalog_version}"', body)
+
+
 # ==========================
 # INSERT JOBS INTO ENDEE
 # ==========================
 @app.post("/insert")
-def insert_jobs():
+def insert_jobs(keep_old: int = 1):
+    if keep_old < 0:
+        return {"error": "keep_old must be 0 or more"}
+
     load_resources()
 
-    payload = []
+    # ✅ Build jobs_index_v{n} in the background, live index keeps serving
+    catalog, _ = read_catalog()
+    job_id, error = start_reindex(catalog, model, shard_map, keep_old=keep_old)
 
-    for _, row in df.iterrows():
-        text = f"{row['title']} {row['skills']} {row['description']}"
-        embedding = model.encode(text).tolist()
+    if error:
+        return {"error": error, "job_id": job_id, "status_url": f"/ingest/{job_id}"}
 
-        location = str(row["location"]).strip().title()
-        experience = str(row["experience"]).strip()
+    return {"job_id": job_id, "status_url": f"/ingest/{job_id}"}
 
-        payload.append(
-            {
-                "id": str(row["job_id"]),
-                "vector": embedding,
-                "meta": {
-                    "title": str(row["title"]),
-                    "company": str(row["company"]),
-                    "location": location,
-                    "skills": str(row["skills"]),
-                    "experience": experience,
-                    "description": str(row["description"]),
-                },
-                # ✅ Endee expects filter as JSON STRING
-                "filter": json.dumps(
-                    {
-                        "location": location,
-                        "experience": experience,
-                    }
-                ),
-            }
-        )
 
-    try:
-        res = requests.post(
-            f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/vector/insert",
-            json=payload,
-            timeout=30,  # ✅ prevents infinite LOADING
-        )
-    except Exception as e:
-        return {"error": f"Endee insert failed: {str(e)}"}
+@app.get("/ingest/{job_id}")
+def ingest_status(job_id: str):
+    job = job_status(job_id)
+    if job is None:
+        return {"error": "Ingest job not found"}
 
-    return {
-        "status_code": res.status_code,
-        "response": res.text,
-        "inserted": len(payload),
-    }
+    return job
+
+
+@app.get("/index/versions")
+def index_versions():
+    return {"active_version": active_version(), "versions": get_index_versions()}
 
 
 # ==========================
 # SEARCH JOBS
 # ==========================
 class SearchRequest(BaseModel):
-    query: str
+    # ✅ Only needed on the first page, cursor calls can omit it
+    query: str | None = None
     location: str | None = None
     experience: str | None = None
     k: int = 5
+    cursor: str | None = None
+    collapse_duplicates: bool = False
+    fields: str | None = None
 
 
-@app.post("/search")
+@app.post("/search", responses={200: {"model": list[JobHit]}})
 def search_jobs(req: SearchRequest):
+    fields, error = parse_fields(req.fields)
+    if error:
+        return {"error": error}
+
+    if int(req.k) <= 0:
+        return {"error": "k must be at least 1"}
+
+    # ✅ Deeper pages: slice the cached candidates, no encode / Endee call
+    if req.cursor:
+        return cached_page(req.cursor, req.k, fields)
+
     load_resources()
 
-    query_text = req.query.strip()
+    query_text = (req.query or "").strip()
 
     # ✅ ignore swagger default "string"
     if query_text.lower() == "string" or len(query_text) == 0:
@@ -131,6 +321,7 @@ def search_jobs(req: SearchRequest):
     query_vector = model.encode(query_text).tolist()
 
     filter_array = []
+    loc = None
 
     if req.location and req.location.strip().lower() not in ["", "string", "all"]:
         loc = req.location.strip().title()
@@ -140,56 +331,26 @@ def search_jobs(req: SearchRequest):
         exp = req.experience.strip()
         filter_array.append({"experience": {"$eq": exp}})
 
-    # ✅ Important: use BIGGER K if filters are ON
-    # because Endee first retrieves by vector then applies filter.
-    endee_k = max(int(req.k), 50) if len(filter_array) > 0 else int(req.k)
+    # ✅ Important: use BIGGER K, because Endee first retrieves by vector
+    # then applies filter, and the extra candidates back the next pages.
+    endee_k = max(int(req.k), CANDIDATE_K)
 
     payload = {"vector": query_vector, "k": endee_k}
 
     if len(filter_array) > 0:
         payload["filter"] = json.dumps(filter_array)
 
-    try:
-        res = requests.post(
-            f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/search",
-            json=payload,
-            timeout=15,
-        )
-    except Exception as e:
-        return {"error": f"Endee search failed: {str(e)}"}
-
-    if res.status_code != 200:
-        return {"error": res.text}
+    # ✅ Only the location's shard when sharded by location, else all shards
+    data, errors = search_shards(live_shards().shards_for_query(loc), payload, timeout=15)
+    if errors and not data:
+        return {"error": f"Endee search failed: {errors}"}
 
-    data = msgpack.unpackb(res.content, raw=False)
+    results = job_hits(data)
+    if req.collapse_duplicates:
+        results = collapse_near_duplicates(results)
 
-    results = []
-    for item in data:
-        # ✅ Endee may return: [score, id] OR [score, id, meta/filter...]
-        score = float(item[0])
-        job_id = int(item[1])
-
-        job = df[df["job_id"] == job_id]
-        if job.empty:
-            continue
-
-        job = job.iloc[0]
-
-        results.append(
-            {
-                "job_id": int(job["job_id"]),
-                "title": job["title"],
-                "company": job["company"],
-                "location": job["location"],
-                "skills": job["skills"],
-                "experience": job["experience"],
-                "description": job["description"],
-                "score": score,
-            }
-        )
-
-    # ✅ return only top req.k (after filter)
-    return results[: int(req.k)]
+    # ✅ return only top req.k (after filter), rest stays behind the cursor
+    return first_page(results, req.k, fields, shard_error_headers(errors))
 
 
 # ==========================
@@ -201,7 +362,7 @@ class ApplyRequest(BaseModel):
 
 @app.post("/apply")
 def apply_jobs(req: ApplyRequest):
-    load_resources()
+    load_catalog()
 
     job = df[df["job_id"] == req.job_id]
     if job.empty:
@@ -215,8 +376,12 @@ def apply_jobs(req: ApplyRequest):
 
 
 @app.get("/applied")
-def applied_jobs():
-    return get_applied_jobs()
+def applied_jobs(request: Request, response: Response):
+    jobs = get_applied_jobs()
+
+    # ✅ Cheap 304 for the frontend when nothing changed
+    etag = hashlib.sha1(json.dumps(jobs, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return conditional(request, response, f'"{etag}"', jobs)
 
 
 @app.delete("/applied/{job_id}")
@@ -228,72 +393,79 @@ def remove_applied(job_id: int):
 # ==========================
 # RESUME MATCHING (PDF)
 # ==========================
-@app.post("/resume-match")
-async def resume_match(file: UploadFile = File(...), k: int = 5):
-    load_resources()
-
-    if not file.filename.lower().endswith(".pdf"):
-        return {"error": "Only PDF resumes are supported"}
-
-    pdf_bytes = await file.read()
-
-    # ✅ Extract resume text
-    resume_text = ""
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    for page in doc:
-        resume_text += page.get_text()
-
-    resume_text = resume_text.strip()
-
-    if len(resume_text) < 30:
-        return {"error": "Resume text is too short / unreadable PDF"}
-
-    resume_vector = model.encode(resume_text).tolist()
+@app.post("/resume-match", responses={200: {"model": list[JobHit]}})
+async def resume_match(
+    file: UploadFile | None = File(None),
+    k: int = 5,
+    cursor: str | None = None,
+    collapse_duplicates: bool = False,
+    fingerprint: str | None = None,
+    fields: str | None = None,
+):
+    fields, error = parse_fields(fields)
+    if error:
+        return {"error": error}
+
+    if int(k) <= 0:
+        return {"error": "k must be at least 1"}
+
+    # ✅ Deeper pages don't need the PDF again
+    if cursor:
+        return cached_page(cursor, k, fields)
+
+    if file is None and not fingerprint:
+        return {"error": "Upload a PDF resume or pass a cursor / fingerprint"}
+
+    load_catalog()
+
+    if file is None:
+        # ✅ Re-query by fingerprint alone, no upload
+        cached = get_cached_resume(fingerprint)
+        if cached is None:
+            return {"error": "Unknown resume fingerprint, upload the PDF again"}
+    else:
+        if not file.filename.lower().endswith(".pdf"):
+            return {"error": "Only PDF resumes are supported"}
+
+        pdf_bytes = await file.read()
+        fingerprint = resume_fingerprint(pdf_bytes)
+        cached = get_cached_resume(fingerprint)
+
+    if cached is not None:
+        # ✅ Same PDF seen before: skip extraction + encoding
+        resume_text, resume_vector = cached
+    else:
+        load_resources()
+
+        # ✅ Extract resume text
+        resume_text = ""
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        for page in doc:
+            resume_text += page.get_text()
+
+        resume_text = resume_text.strip()
+
+        if len(resume_text) < 30:
+            return {"error": "Resume text is too short / unreadable PDF"}
+
+        resume_vector = model.encode(resume_text).tolist()
+        cache_resume(fingerprint, resume_text, resume_vector)
 
     payload = {
         "vector": resume_vector,
-        "k": int(k),
+        "k": max(int(k), CANDIDATE_K),
     }
 
-    try:
-        res = requests.post(
-            f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/search",
-            json=payload,
-            timeout=15,
-        )
-    except Exception as e:
-        return {"error": f"Endee resume-match failed: {str(e)}"}
-
-    if res.status_code != 200:
-        return {"error": res.text}
-
-    data = msgpack.unpackb(res.content, raw=False)
-
-    results = []
-    for item in data:
-        score = float(item[0])
-        job_id = int(item[1])
-
-        job = df[df["job_id"] == job_id]
-        if job.empty:
-            continue
+    data, errors = search_shards(live_shards().shards_for_query(), payload, timeout=15)
+    if errors and not data:
+        return {"error": f"Endee resume-match failed: {errors}"}
 
-        job = job.iloc[0]
+    results = job_hits(data)
+    if collapse_duplicates:
+        results = collapse_near_duplicates(results)
 
-        results.append(
-            {
-                "job_id": int(job["job_id"]),
-                "title": job["title"],
-                "company": job["company"],
-                "location": job["location"],
-                "skills": job["skills"],
-                "experience": job["experience"],
-                "description": job["description"],
-                "score": score,
-            }
-        )
-
-    return results[: int(k)]
+    headers = {FINGERPRINT_HEADER: fingerprint, **shard_error_headers(errors)}
+    return first_page(results, k, fields, headers)
 
 
 # ==========================
@@ -302,10 +474,15 @@ async def resume_match(file: UploadFile = File(...), k: int = 5):
 class RagRequest(BaseModel):
     question: str
     k: int = 5
+    fields: str | None = None
 
 
 @app.post("/rag")
 def rag_answer(req: RagRequest):
+    fields, error = parse_fields(req.fields)
+    if error:
+        return {"error": error}
+
     load_resources()
 
     question = req.question.strip()
@@ -317,46 +494,18 @@ def rag_answer(req: RagRequest):
 
     payload = {"vector": q_vec, "k": max(int(req.k), 10)}
 
-    try:
-        res = requests.post(
-            f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/search",
-            json=payload,
-            timeout=15,
-        )
-    except Exception as e:
-        return {"error": f"Endee RAG search failed: {str(e)}"}
+    data, errors = search_shards(live_shards().shards_for_query(), payload, timeout=15)
+    if errors and not data:
+        return {"error": f"Endee RAG search failed: {errors}"}
 
-    if res.status_code != 200:
-        return {"error": res.text}
-
-    data = msgpack.unpackb(res.content, raw=False)
-
-    context_jobs = []
-    for item in data[: int(req.k)]:
-        score = float(item[0])
-        job_id = int(item[1])
-
-        job = df[df["job_id"] == job_id]
-        if job.empty:
-            continue
-
-        job = job.iloc[0]
-
-        context_jobs.append(
-            {
-                "job_id": int(job["job_id"]),
-                "title": job["title"],
-                "company": job["company"],
-                "location": job["location"],
-                "skills": job["skills"],
-                "experience": job["experience"],
-                "description": job["description"],
-                "score": score,
-            }
-        )
+    context_jobs = job_hits(data[: int(req.k)])
+    # ✅ Context only covers the shards that answered
+    partial = {"shard_errors": errors} if errors else {}
+    if errors:
+        logger.warning("Partial RAG context, failed shards: %s", errors)
 
     if not context_jobs:
-        return {"answer": "No jobs found for your query.", "context_jobs": []}
+        return {"answer": "No jobs found for your query.", "context_jobs": [], **partial}
 
     # ✅ Build prompt for Ollama
     context_text = ""
@@ -399,11 +548,12 @@ Give a helpful answer and mention best matching job titles.
             timeout=60,
         )
     except Exception as e:
-        return {"error": f"Ollama call failed: {str(e)}", "context_jobs": context_jobs}
+        return {"error": f"Ollama call failed: {str(e)}", "context_jobs": project(context_jobs, fields), **partial}
 
     if ollama_res.status_code != 200:
-        return {"error": ollama_res.text, "context_jobs": context_jobs}
+        return {"error": ollama_res.text, "context_jobs": project(context_jobs, fields), **partial}
 
     answer = ollama_res.json().get("response", "No response generated.")
 
-    return {"answer": answer, "context_jobs": context_jobs}
+    # ✅ Prompt used full jobs, the response only carries the requested fields
+    return {"answer": answer, "context_jobs": project(context_jobs, fields), **partial}
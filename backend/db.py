@@ -21,6 +21,33 @@ def init_db():
         )
     """)
 
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS index_versions (
+            version INTEGER PRIMARY KEY,
+            state TEXT,
+            created_at TEXT,
+            activated_at TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            job_id TEXT PRIMARY KEY,
+            state TEXT,
+            phase TEXT,
+            version INTEGER,
+            total INTEGER,
+            processed INTEGER,
+            inserted INTEGER,
+            encodes_saved INTEGER,
+            error TEXT,
+            started_at TEXT,
+            updated_at TEXT,
+            finished_at TEXT,
+            elapsed_seconds REAL
+        )
+    """)
+
     conn.commit()
     conn.close()
 
@@ -80,3 +107,161 @@ def delete_applied_job(job_id: int):
     cur.execute("DELETE FROM applied_jobs WHERE job_id=?", (job_id,))
     conn.commit()
     conn.close()
+
+
+# ==========================
+# INDEX VERSIONS (BLUE / GREEN)
+# ==========================
+def new_index_version():
+    """Reserves the next index version in state 'building'"""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("""
+        INSERT INTO index_versions (version, state, created_at)
+        VALUES ((SELECT COALESCE(MAX(version), 0) + 1 FROM index_versions), 'building', ?)
+    """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    version = cur.lastrowid
+
+    conn.commit()
+    conn.close()
+    return version
+
+
+def set_index_version_state(version: int, state: str):
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("UPDATE index_versions SET state=? WHERE version=?", (state, version))
+    conn.commit()
+    conn.close()
+
+
+def activate_index_version(version: int):
+    """Atomically makes `version` the active index (previous one is retired).
+
+    On the first swap the unversioned index (version 0) gets a 'retired' row,
+    so it is kept for rollback and later dropped like any other generation.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("SELECT COUNT(*) FROM index_versions WHERE state='active'")
+    if cur.fetchone()[0] == 0:
+        cur.execute("INSERT OR IGNORE INTO index_versions (version, state, created_at) VALUES (0, 'retired', NULL)")
+
+    cur.execute("UPDATE index_versions SET state='retired' WHERE state='active'")
+    cur.execute(
+        "UPDATE index_versions SET state='active', activated_at=? WHERE version=?",
+        (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), version),
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_active_index_version():
+    """Active version, or 0 when the unversioned index is still serving"""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("SELECT version FROM index_versions WHERE state='active'")
+    row = cur.fetchone()
+
+    conn.close()
+    return row[0] if row else 0
+
+
+def get_index_versions(state: str | None = None):
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    if state:
+        cur.execute("SELECT * FROM index_versions WHERE state=? ORDER BY version DESC", (state,))
+    else:
+        cur.execute("SELECT * FROM index_versions ORDER BY version DESC")
+    rows = cur.fetchall()
+
+    conn.close()
+
+    return [
+        {"version": r[0], "state": r[1], "created_at": r[2], "activated_at": r[3]}
+        for r in rows
+    ]
+
+
+# ==========================
+# INGEST JOBS
+# ==========================
+INGEST_JOB_FIELDS = [
+    "job_id", "state", "phase", "version", "total", "processed", "inserted",
+    "encodes_saved", "error", "started_at", "updated_at", "finished_at", "elapsed_seconds",
+]
+
+
+def claim_ingest_job(job_id: str, total: int, stale_seconds: int):
+    """Creates a queued job unless another one is running.
+
+    Check and insert run in one BEGIN IMMEDIATE transaction, so only one
+    process can claim the slot. A running job not updated for
+    `stale_seconds` is marked failed ("interrupted") and replaced.
+    Returns the job_id of the already running job, or None if claimed.
+    """
+    now = datetime.now()
+    stamp = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None, timeout=30)
+    cur = conn.cursor()
+
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+
+        cur.execute("SELECT job_id, updated_at FROM ingest_jobs WHERE state IN ('queued', 'running')")
+        for running_id, updated_at in cur.fetchall():
+            age = (now - datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S")).total_seconds()
+            if age <= stale_seconds:
+                cur.execute("ROLLBACK")
+                return running_id
+
+            cur.execute(
+                "UPDATE ingest_jobs SET state='failed', error='interrupted', updated_at=? WHERE job_id=?",
+                (stamp, running_id),
+            )
+
+        cur.execute("""
+            INSERT INTO ingest_jobs
+            (job_id, state, phase, total, processed, inserted, encodes_saved, started_at, updated_at, elapsed_seconds)
+            VALUES (?, 'queued', 'queued', ?, 0, 0, 0, ?, ?, 0)
+        """, (job_id, total, stamp, stamp))
+
+        cur.execute("COMMIT")
+        return None
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def update_ingest_job(job_id: str, **fields):
+    fields["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    columns = ", ".join(f"{name}=?" for name in fields)
+
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute(f"UPDATE ingest_jobs SET {columns} WHERE job_id=?", (*fields.values(), job_id))
+    conn.commit()
+    conn.close()
+
+
+def get_ingest_job(job_id: str):
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("SELECT * FROM ingest_jobs WHERE job_id=?", (job_id,))
+    row = cur.fetchone()
+
+    conn.close()
+    return dict(zip(INGEST_JOB_FIELDS, row)) if row else None
+
@@ -0,0 +1,99 @@
+import hashlib
+import random
+import re
+from functools import lru_cache
+
+# ==========================
+# CONFIG
+# ==========================
+MINHASH_PERMUTATIONS = 128
+# ✅ Min estimated Jaccard of two descriptions to count as near-duplicates.
+# Measured on the catalog templates (check_dedup.py): reposts with a city /
+# company suffix or one swapped word score 0.6-0.8, distinct templates <= 0.2.
+NEAR_DUPLICATE_SIMILARITY = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# ✅ Fixed seed: signatures must match across processes
+_rng = random.Random(42)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def job_text(row) -> str:
+    """Text that gets embedded for a job row"""
+    return f"{row['title']} {row['skills']} {row['description']}"
+
+
+# ==========================
+# INGEST: ENCODE UNIQUE TEXTS ONCE
+# ==========================
+def encode_unique(model, texts: list, cache: dict | None = None):
+    """Encodes every distinct text once and fans the vectors back out.
+
+    Pass the same `cache` dict (text -> vector) across calls when ingesting
+    in chunks, so texts repeated in later chunks are not encoded again.
+    Returns (vectors, encodes_saved) where vectors lines up with texts.
+    """
+    lookup = {} if cache is None else cache
+
+    new = [text for text in dict.fromkeys(texts) if text not in lookup]
+    if new:
+        lookup.update(zip(new, model.encode(new)))
+
+    vectors = [lookup[text] for text in texts]
+    return vectors, len(texts) - len(new)
+
+
+# ==========================
+# QUERY TIME: NEAR-DUPLICATE COLLAPSE
+# ==========================
+def _shingles(text: str):
+    tokens = _TOKEN_RE.findall(text.lower())
+    # ✅ words + word bigrams: descriptions are short, bigrams alone swing too much
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+@lru_cache(maxsize=4096)
+def minhash(text: str) -> tuple:
+    """MinHash signature of the description's shingles"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in _shingles(text)
+    ]
+    if not hashes:
+        return (_MERSENNE_PRIME,) * MINHASH_PERMUTATIONS
+
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def collapse_near_duplicates(hits: list, threshold=NEAR_DUPLICATE_SIMILARITY):
+    """Keeps the best scoring hit of every near-duplicate group.
+
+    Hits are expected best-first and compared by their description. The
+    job_ids of collapsed postings are listed under "duplicate_job_ids" on the
+    hit that was kept.
+    """
+    kept = []
+    signatures = []
+
+    for hit in hits:
+        signature = minhash(str(hit.get("description", "")))
+
+        for i, other in enumerate(signatures):
+            if similarity(signature, other) >= threshold:
+                kept[i]["duplicate_job_ids"].append(hit["job_id"])
+                break
+        else:
+            kept.append({**hit, "duplicate_job_ids": []})
+            signatures.append(signature)
+
+    return kept
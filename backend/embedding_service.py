@@ -0,0 +1,361 @@
+"""Embedding service: a fixed pool of encoder processes shared by API workers.
+
+Run it once next to the API:
+
+    python -m backend.embedding_service --workers 4 --cores-per-worker 2
+
+and start uvicorn with EMBEDDING_SERVICE_ADDR=127.0.0.1:50055 so every HTTP
+worker sends its text here instead of loading its own model. Vectors come back
+through shared memory created by the caller, only names and texts are pickled.
+"""
+
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.managers import BaseManager
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+# ==========================
+# CONFIG
+# ==========================
+MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+
+DEFAULT_ADDRESS = "127.0.0.1:50055"
+DEFAULT_AUTHKEY = "job-ai-embeddings"
+
+# ✅ Max texts one encoder process encodes in a single model call
+MAX_BATCH = 64
+# ✅ Admission control: requests in flight before new ones are rejected
+MAX_PENDING = 128
+ADMISSION_TIMEOUT = 2.0
+ENCODE_TIMEOUT = 30.0
+# ✅ How often the dispatcher checks for dead encoders while idle
+DEAD_CHECK_INTERVAL = 1.0
+
+
+class EmbeddingOverloaded(RuntimeError):
+    """Raised when the pool is saturated and a request could not be admitted"""
+
+
+class EmbeddingTimeout(EmbeddingOverloaded, TimeoutError):
+    """Raised when an admitted request did not finish within ENCODE_TIMEOUT"""
+
+
+def parse_address(address: str):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# ==========================
+# ENCODER PROCESS
+# ==========================
+def _pin_to_cores(cores):
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    import torch
+
+    torch.set_num_threads(len(cores))
+
+
+def _write_vectors(shm_name, vectors):
+    shm = SharedMemory(name=shm_name)
+    # ✅ The caller owns (and unlinks) the block, don't let our tracker touch it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        out = np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf)
+        out[:] = vectors
+        del out
+    finally:
+        shm.close()
+
+
+def _encoder_main(cores, task_queue, result_queue):
+    """Loads the model once, then encodes micro-batches of queued tasks"""
+    _pin_to_cores(cores)
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(MODEL_NAME)
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        # ✅ Drain more queued tasks into one model call
+        batch = [task]
+        size = len(task[2])
+        while size < MAX_BATCH:
+            try:
+                nxt = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                task_queue.put(None)
+                break
+            batch.append(nxt)
+            size += len(nxt[2])
+
+        texts = [text for _, _, task_texts in batch for text in task_texts]
+
+        try:
+            vectors = model.encode(texts, batch_size=MAX_BATCH, convert_to_numpy=True)
+            vectors = np.asarray(vectors, dtype=np.float32)
+        except Exception as e:
+            for task_id, _, _ in batch:
+                result_queue.put((task_id, f"encode failed: {e}"))
+            continue
+
+        offset = 0
+        for task_id, shm_name, task_texts in batch:
+            n = len(task_texts)
+            try:
+                _write_vectors(shm_name, vectors[offset : offset + n])
+                result_queue.put((task_id, None))
+            except Exception as e:
+                result_queue.put((task_id, f"shared memory write failed: {e}"))
+            offset += n
+
+
+# ==========================
+# POOL
+# ==========================
+class EmbeddingPool:
+    """Fixed set of encoder processes, each pinned to its own core budget"""
+
+    def __init__(self, workers=2, cores_per_worker=1, max_pending=MAX_PENDING):
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._ids = itertools.count()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._waiting = {}
+        self._lock = threading.Lock()
+
+        self.max_pending = max_pending
+        self.stats = {
+            "admitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "texts_encoded": 0,
+            "encode_seconds": 0.0,
+        }
+
+        # ✅ Only CPUs this process may run on (container --cpuset-cpus), not every host CPU
+        if hasattr(os, "sched_getaffinity"):
+            allowed = sorted(os.sched_getaffinity(0))
+        else:
+            allowed = list(range(os.cpu_count() or 1))
+
+        self._procs = []
+        for i in range(workers):
+            cores = {allowed[(i * cores_per_worker + c) % len(allowed)] for c in range(cores_per_worker)}
+            proc = ctx.Process(
+                target=_encoder_main,
+                args=(cores, self._tasks, self._results),
+                name=f"encoder-{i}",
+                daemon=True,
+            )
+            proc.start()
+            self._procs.append(proc)
+
+        threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def workers_alive(self):
+        return sum(p.is_alive() for p in self._procs)
+
+    def _finish(self, task_id, error):
+        with self._lock:
+            waiter = self._waiting.pop(task_id, None)
+        if waiter is None:
+            return
+
+        if waiter[2]:
+            # ✅ Caller timed out: its slot is only freed once the encoder is done
+            self._slots.release()
+        else:
+            waiter[1] = error
+            waiter[0].set()
+
+    def _dispatch(self):
+        while True:
+            try:
+                task_id, error = self._results.get(timeout=DEAD_CHECK_INTERVAL)
+            except queue.Empty:
+                # ✅ No encoder left to answer: fail waiters + free abandoned slots
+                if not self.workers_alive():
+                    with self._lock:
+                        task_ids = list(self._waiting)
+                    for task_id in task_ids:
+                        self._finish(task_id, "no encoder workers alive")
+                continue
+
+            self._finish(task_id, error)
+
+    def encode_into(self, shm_name: str, texts: list):
+        """Encodes texts into the caller's shared memory block (n x dim float32)"""
+        if not self.workers_alive():
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise EmbeddingOverloaded("No embedding workers alive, check the service logs")
+
+        if not self._slots.acquire(timeout=ADMISSION_TIMEOUT):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise EmbeddingOverloaded("Embedding service is overloaded, try again")
+
+        task_id = next(self._ids)
+        # [done event, error, abandoned]
+        waiter = [threading.Event(), None, False]
+        start = time.perf_counter()
+        release_slot = True
+
+        try:
+            with self._lock:
+                self.stats["admitted"] += 1
+                self._waiting[task_id] = waiter
+
+            self._tasks.put((task_id, shm_name, list(texts)))
+
+            if not waiter[0].wait(ENCODE_TIMEOUT):
+                with self._lock:
+                    # ✅ Still queued / encoding: keep the slot held until the
+                    # dispatcher sees its result, so abandoned work stays bounded
+                    abandoned = task_id in self._waiting
+                    if abandoned:
+                        waiter[2] = True
+                        release_slot = False
+                        self.stats["timed_out"] += 1
+                if abandoned:
+                    raise EmbeddingTimeout("Embedding service timed out, try again")
+                # ✅ Result arrived just as we timed out, the dispatcher sets it now
+                waiter[0].wait()
+
+            with self._lock:
+                if waiter[1] is not None:
+                    self.stats["failed"] += 1
+                else:
+                    self.stats["completed"] += 1
+                    self.stats["texts_encoded"] += len(texts)
+                    self.stats["encode_seconds"] += time.perf_counter() - start
+
+            if waiter[1] is not None:
+                if not self.workers_alive():
+                    raise EmbeddingOverloaded(waiter[1])
+                raise RuntimeError(waiter[1])
+        finally:
+            if release_slot:
+                self._slots.release()
+
+        return len(texts)
+
+    def metrics(self):
+        try:
+            queue_depth = self._tasks.qsize()
+        except NotImplementedError:
+            queue_depth = None
+
+        with self._lock:
+            stats = dict(self.stats)
+            in_flight = len(self._waiting)
+
+        completed = stats["completed"]
+        stats["avg_request_ms"] = round(1000 * stats.pop("encode_seconds") / completed, 2) if completed else 0.0
+        stats.update(
+            {
+                "workers": len(self._procs),
+                "workers_alive": self.workers_alive(),
+                "in_flight": in_flight,
+                "queue_depth": queue_depth,
+                "max_pending": self.max_pending,
+            }
+        )
+        return stats
+
+    def close(self):
+        for _ in self._procs:
+            self._tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+
+
+# ==========================
+# SERVER / CLIENT
+# ==========================
+class _ServiceManager(BaseManager):
+    pass
+
+
+class EmbeddingClient:
+    """Drop-in for SentenceTransformer.encode() backed by the embedding service"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY):
+        _ServiceManager.register("embedding_pool")
+        manager = _ServiceManager(address=parse_address(address), authkey=authkey.encode("utf-8"))
+        manager.connect()
+        self._pool = manager.embedding_pool()
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        shm = SharedMemory(create=True, size=len(texts) * EMBEDDING_DIM * 4)
+        try:
+            self._pool.encode_into(shm.name, texts)
+            view = np.ndarray((len(texts), EMBEDDING_DIM), dtype=np.float32, buffer=shm.buf)
+            vectors = view.copy()
+            del view
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return vectors[0] if single else vectors
+
+    def metrics(self):
+        return self._pool.metrics()
+
+
+def serve(address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, workers=2, cores_per_worker=1, max_pending=MAX_PENDING):
+    pool = EmbeddingPool(workers=workers, cores_per_worker=cores_per_worker, max_pending=max_pending)
+
+    _ServiceManager.register("embedding_pool", callable=lambda: pool, exposed=("encode_into", "metrics"))
+    manager = _ServiceManager(address=parse_address(address), authkey=authkey.encode("utf-8"))
+
+    print(f"✅ Embedding service on {address} with {workers} workers x {cores_per_worker} cores")
+    try:
+        manager.get_server().serve_forever()
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared embedding worker pool")
+    parser.add_argument("--address", default=os.getenv("EMBEDDING_SERVICE_ADDR", DEFAULT_ADDRESS))
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--cores-per-worker", type=int, default=1)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    args = parser.parse_args()
+
+    # ✅ Import by module name so pickled errors resolve in API workers too
+    from backend.embedding_service import serve
+
+    serve(
+        address=args.address,
+        authkey=os.getenv("EMBEDDING_SERVICE_KEY", DEFAULT_AUTHKEY),
+        workers=args.workers,
+        cores_per_worker=args.cores_per_worker,
+        max_pending=args.max_pending,
+    )
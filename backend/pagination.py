@@ -0,0 +1,118 @@
+import json
+import secrets
+import sqlite3
+import time
+
+# ==========================
+# CONFIG
+# ==========================
+# ✅ SQLite so every uvicorn worker can serve any cursor
+DB_PATH = "backend/search_cursors.db"
+
+CURSOR_TTL_SECONDS = 300
+MAX_CURSORS = 256
+MAX_CANDIDATES = 200
+
+
+class CursorCache:
+    """Keeps the candidate list of a search so deeper pages are a slice lookup.
+
+    Entries live in SQLite (shared by all API workers), expire after `ttl`
+    seconds, and the least recently used ones are dropped once `max_entries`
+    is reached, so the store stays bounded.
+    """
+
+    def __init__(self, ttl=CURSOR_TTL_SECONDS, max_entries=MAX_CURSORS, max_candidates=MAX_CANDIDATES, db_path=DB_PATH):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self.db_path = db_path
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cursors (
+                cursor_key TEXT PRIMARY KEY,
+                candidates TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def store(self, candidates: list) -> str:
+        """Stores candidates and returns the cache key for them"""
+        key = secrets.token_urlsafe(12)
+        now = time.time()
+
+        conn = sqlite3.connect(self.db_path)
+        cur = conn.cursor()
+
+        cur.execute("DELETE FROM search_cursors WHERE created_at < ?", (now - self.ttl,))
+        cur.execute(
+            "INSERT INTO search_cursors (cursor_key, candidates, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(candidates[: self.max_candidates]), now, now),
+        )
+        # ✅ Size limit: keep only the most recently used entries
+        cur.execute("""
+            DELETE FROM search_cursors WHERE cursor_key NOT IN (
+                SELECT cursor_key FROM search_cursors ORDER BY last_used DESC LIMIT ?
+            )
+        """, (self.max_entries,))
+
+        conn.commit()
+        conn.close()
+        return key
+
+    def get(self, key: str):
+        """Returns the stored candidates, or None if missing / expired"""
+        now = time.time()
+
+        conn = sqlite3.connect(self.db_path)
+        cur = conn.cursor()
+
+        cur.execute(
+            "SELECT candidates FROM search_cursors WHERE cursor_key=? AND created_at >= ?",
+            (key, now - self.ttl),
+        )
+        row = cur.fetchone()
+
+        if row is not None:
+            cur.execute("UPDATE search_cursors SET last_used=? WHERE cursor_key=?", (now, key))
+            conn.commit()
+
+        conn.close()
+        return json.loads(row[0]) if row else None
+
+
+def make_cursor(key: str, offset: int) -> str:
+    return f"{key}.{offset}"
+
+
+def parse_cursor(cursor: str):
+    """Returns (key, offset) or None if the cursor is malformed"""
+    key, _, offset = cursor.strip().rpartition(".")
+    if not key or not offset.isdigit():
+        return None
+    return key, int(offset)
+
+
+def paginate(cache: CursorCache, candidates: list, k: int, offset: int = 0, key: str | None = None):
+    """Slices one page out of candidates.
+
+    Returns (page, next_cursor). The candidates are stored on the first page
+    so the returned cursor can be used to fetch the next one.
+    """
+    if k <= 0:
+        raise ValueError("Page size k must be at least 1")
+
+    page = candidates[offset : offset + k]
+    next_offset = offset + k
+
+    if next_offset >= min(len(candidates), cache.max_candidates):
+        return page, None
+
+    if key is None:
+        key = cache.store(candidates)
+
+    return page, make_cursor(key, next_offset)
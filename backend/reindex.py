@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from backend.db import (
+    new_index_version,
+    set_index_version_state,
+    activate_index_version,
+    get_active_index_version,
+    get_index_versions,
+    claim_ingest_job,
+    update_ingest_job,
+    get_ingest_job,
+)
+from backend.dedup import job_text, encode_unique
+from backend.sharding import create_shard_indexes, drop_shard_indexes, insert_sharded
+
+# ==========================
+# CONFIG
+# ==========================
+# ✅ Rows encoded + uploaded per progress step
+CHUNK_SIZE = 256
+# ✅ Retired versions kept for rollback after a swap
+KEEP_OLD_VERSIONS = 1
+# ✅ A running job not updated for this long is treated as dead
+JOB_STALE_SECONDS = 600
+# ✅ How long API workers trust their cached active version
+ACTIVE_VERSION_TTL = 1.0
+
+_active = {"version": None, "checked": 0.0}
+
+
+def active_version():
+    """Active index version (0 = unversioned index), cached for a second"""
+    now = time.monotonic()
+    if _active["version"] is None or now - _active["checked"] > ACTIVE_VERSION_TTL:
+        _active["version"] = get_active_index_version()
+        _active["checked"] = now
+    return _active["version"]
+
+
+def job_item(row, vector):
+    """Endee insert item for one catalog row"""
+    location = str(row["location"]).strip().title()
+    experience = str(row["experience"]).strip()
+
+    return {
+        "id": str(row["job_id"]),
+        "vector": vector.tolist(),
+        "meta": {
+            "title": str(row["title"]),
+            "company": str(row["company"]),
+            "location": location,
+            "skills": str(row["skills"]),
+            "experience": experience,
+            "description": str(row["description"]),
+        },
+        # ✅ Endee expects filter as JSON STRING
+        "filter": json.dumps(
+            {
+                "location": location,
+                "experience": experience,
+            }
+        ),
+    }
+
+
+def job_status(job_id: str):
+    """Job row + derived progress / throughput, or None"""
+    job = get_ingest_job(job_id)
+    if job is None:
+        return None
+
+    total = job["total"] or 0
+    elapsed = job["elapsed_seconds"] or 0.0
+    job["progress"] = round(job["processed"] / total, 4) if total else 0.0
+    job["rows_per_second"] = round(job["processed"] / elapsed, 2) if elapsed else 0.0
+    return job
+
+
+def start_reindex(catalog, model, shard_map, keep_old=KEEP_OLD_VERSIONS, background=True):
+    """Starts a rebuild into a fresh index version.
+
+    Returns (job_id, error). Only one re-index runs at a time; the running
+    job_id is returned with an error if another one is in progress. With
+    background=False the build runs in the caller (used by insert_jobs.py).
+    """
+    if keep_old < 0:
+        raise ValueError("keep_old must be 0 or more")
+
+    job_id = uuid.uuid4().hex[:12]
+
+    # ✅ Atomic across all API workers (one SQLite write transaction)
+    running_id = claim_ingest_job(job_id, int(len(catalog)), JOB_STALE_SECONDS)
+    if running_id is not None:
+        return running_id, "A re-index is already running"
+
+    if not background:
+        _run_reindex(job_id, catalog, model, shard_map, keep_old)
+        return job_id, None
+
+    threading.Thread(
+        target=_run_reindex,
+        args=(job_id, catalog, model, shard_map, keep_old),
+        name=f"reindex-{job_id}",
+        daemon=True,
+    ).start()
+
+    return job_id, None
+
+
+def _run_reindex(job_id, catalog, model, shard_map, keep_old):
+    start = time.perf_counter()
+    version = None
+
+    def elapsed():
+        return round(time.perf_counter() - start, 3)
+
+    try:
+        version = new_index_version()
+        target = shard_map.versioned(version)
+        update_ingest_job(job_id, state="running", phase="creating_index", version=version)
+
+        failed = [r for r in create_shard_indexes(target) if r["status_code"] not in (200, 201)]
+        if failed:
+            raise RuntimeError(f"Index create failed: {failed}")
+
+        # ✅ Old version keeps serving while the new one fills up
+        processed = inserted = encodes_saved = 0
+        # ✅ Shared across chunks: each distinct text is encoded once per ingest
+        vector_by_text = {}
+        for begin in range(0, len(catalog), CHUNK_SIZE):
+            chunk = catalog.iloc[begin : begin + CHUNK_SIZE]
+
+            update_ingest_job(job_id, phase="encoding")
+            texts = [job_text(row) for _, row in chunk.iterrows()]
+            vectors, saved = encode_unique(model, texts, cache=vector_by_text)
+            items = [job_item(row, vector) for (_, row), vector in zip(chunk.iterrows(), vectors)]
+
+            update_ingest_job(job_id, phase="uploading")
+            results = insert_sharded(target, items, timeout=30)
+            errors = [r for r in results if "error" in r]
+            if errors:
+                raise RuntimeError(f"Endee insert failed: {errors}")
+
+            processed += len(chunk)
+            inserted += sum(r["inserted"] for r in results)
+            encodes_saved += saved
+            update_ingest_job(
+                job_id,
+                processed=processed,
+                inserted=inserted,
+                encodes_saved=encodes_saved,
+                elapsed_seconds=elapsed(),
+            )
+
+        # ✅ Swap: one transaction flips the active version for every worker
+        update_ingest_job(job_id, phase="swapping")
+        activate_index_version(version)
+        _active.update(version=version, checked=time.monotonic())
+
+        update_ingest_job(job_id, phase="cleanup")
+        for old in get_index_versions("retired")[keep_old:]:
+            drop_shard_indexes(shard_map.versioned(old["version"]))
+            set_index_version_state(old["version"], "dropped")
+
+        update_ingest_job(
+            job_id,
+            state="succeeded",
+            phase="done",
+            elapsed_seconds=elapsed(),
+            finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
+    except Exception as e:
+        # ✅ No version reserved (e.g. SQLite lock timeout): nothing to clean up
+        if version is not None:
+            set_index_version_state(version, "failed")
+            drop_shard_indexes(target)
+        update_ingest_job(
+            job_id,
+            state="failed",
+            phase="failed",
+            error=str(e),
+            elapsed_seconds=elapsed(),
+            finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        )
@@ -0,0 +1,56 @@
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+# ✅ orjson is optional: job lists use it when installed, else the stock encoder
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as JobsResponse
+except ImportError:
+    JobsResponse = JSONResponse
+
+# ✅ Fields a job hit can be projected to (?fields=job_id,title,score)
+JOB_FIELDS = [
+    "job_id", "title", "company", "location", "skills",
+    "experience", "description", "score", "duplicate_job_ids",
+]
+
+
+class JobHit(BaseModel):
+    """One job in a result list; every job response is built from this model"""
+
+    job_id: int | None = None
+    title: str | None = None
+    company: str | None = None
+    location: str | None = None
+    skills: str | None = None
+    experience: str | None = None
+    description: str | None = None
+    score: float | None = None
+    duplicate_job_ids: list[int] | None = None
+
+
+def parse_fields(fields: str | None):
+    """Returns (field list or None for all, error)"""
+    if not fields or not fields.strip():
+        return None, None
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in JOB_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {unknown}, allowed: {JOB_FIELDS}"
+
+    return names, None
+
+
+_JOB_HITS = TypeAdapter(list[JobHit])
+
+
+def project(hits: list, fields):
+    """Validates hits as JobHit models and dumps only the requested fields"""
+    include = {"__all__": set(fields)} if fields else None
+    return _JOB_HITS.dump_python(_JOB_HITS.validate_python(hits), include=include, exclude_none=True)
+
+
+def jobs_response(hits: list, fields=None, headers=None):
+    """Typed + projected hits, serialized through orjson when it is installed"""
+    return JobsResponse(project(hits, fields), headers=headers)
@@ -0,0 +1,90 @@
+import hashlib
+import sqlite3
+from array import array
+from datetime import datetime
+
+DB_PATH = "backend/resume_cache.db"
+
+# ✅ Oldest (least recently used) resumes are evicted above this size
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+
+def init_resume_cache():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS resume_cache (
+            fingerprint TEXT PRIMARY KEY,
+            resume_text TEXT,
+            vector BLOB,
+            size INTEGER,
+            created_at TEXT,
+            last_used TEXT
+        )
+    """)
+
+    conn.commit()
+    conn.close()
+
+
+def resume_fingerprint(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def get_cached_resume(fingerprint: str):
+    """Returns (resume_text, vector) or None, and marks the entry as used"""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute(
+        "SELECT resume_text, vector FROM resume_cache WHERE fingerprint=?",
+        (fingerprint,),
+    )
+    row = cur.fetchone()
+
+    if row is not None:
+        cur.execute(
+            "UPDATE resume_cache SET last_used=? WHERE fingerprint=?",
+            (datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"), fingerprint),
+        )
+        conn.commit()
+
+    conn.close()
+
+    if row is None:
+        return None
+
+    vector = array("f")
+    vector.frombytes(row[1])
+    return row[0], vector.tolist()
+
+
+def cache_resume(fingerprint: str, resume_text: str, vector: list):
+    blob = array("f", vector).tobytes()
+    size = len(blob) + len(resume_text.encode("utf-8"))
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    cur.execute("""
+        INSERT OR REPLACE INTO resume_cache
+        (fingerprint, resume_text, vector, size, created_at, last_used)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (fingerprint, resume_text, blob, size, now, now))
+
+    # ✅ Size-based eviction, least recently used first
+    cur.execute("SELECT COALESCE(SUM(size), 0) FROM resume_cache")
+    total = cur.fetchone()[0]
+
+    if total > MAX_CACHE_BYTES:
+        cur.execute("SELECT fingerprint, size FROM resume_cache ORDER BY last_used ASC")
+        for old_fingerprint, old_size in cur.fetchall():
+            if total <= MAX_CACHE_BYTES or old_fingerprint == fingerprint:
+                break
+            conn.execute("DELETE FROM resume_cache WHERE fingerprint=?", (old_fingerprint,))
+            total -= old_size
+
+    conn.commit()
+    conn.close()
@@ -0,0 +1,221 @@
+import heapq
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import msgpack
+import requests
+
+# ==========================
+# CONFIG
+# ==========================
+SHARD_CONFIG = os.getenv("SHARD_CONFIG", "shards.json")
+DEFAULT_ENDEE_URL = "http://localhost:8080"
+DEFAULT_INDEX_NAME = "jobs_index"
+
+# ✅ Vectors per insert request sent to one shard
+INSERT_BATCH = 500
+MAX_PARALLEL = 8
+
+# ✅ Long-lived pools, no thread startup per request. Uploads get their own so a
+# running re-index can't queue searches behind it.
+_search_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL, thread_name_prefix="shard-search")
+_insert_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL, thread_name_prefix="shard-insert")
+
+
+class ShardMap:
+    """Routes postings to Endee indexes, by hash of job_id or by location.
+
+    Config (JSON):
+        {
+          "strategy": "hash" | "location",
+          "shards": [
+            {"url": "http://localhost:8080", "index": "jobs_index_0", "locations": ["Chennai"]},
+            ...
+          ]
+        }
+
+    With the "location" strategy a shard without "locations" takes every
+    location not listed elsewhere.
+    """
+
+    def __init__(self, shards: list, strategy: str = "hash"):
+        if not shards:
+            raise ValueError("Shard map needs at least one shard")
+        if strategy not in ("hash", "location"):
+            raise ValueError(f"Unknown shard strategy: {strategy}")
+
+        self.strategy = strategy
+        self.shards = [
+            {
+                "url": s.get("url", DEFAULT_ENDEE_URL).rstrip("/"),
+                "index": s["index"],
+                "locations": [str(loc).strip().lower() for loc in s.get("locations", [])],
+            }
+            for s in shards
+        ]
+
+        self._by_location = {}
+        self._fallback = None
+        for shard in self.shards:
+            for loc in shard["locations"]:
+                self._by_location[loc] = shard
+            if not shard["locations"]:
+                self._fallback = shard
+
+    def shard_for(self, job_id, location=None):
+        if self.strategy == "location":
+            loc = str(location or "").strip().lower()
+            shard = self._by_location.get(loc, self._fallback)
+            if shard is None:
+                raise ValueError(f"No shard configured for location: {location}")
+            return shard
+
+        # ✅ Stable across processes (unlike hash())
+        return self.shards[zlib.crc32(str(job_id).encode("utf-8")) % len(self.shards)]
+
+    def shards_for_query(self, location=None):
+        """Only the matching shard when filtering by location, else all of them"""
+        if self.strategy == "location" and location:
+            loc = location.strip().lower()
+            shard = self._by_location.get(loc, self._fallback)
+            return [shard] if shard is not None else []
+
+        return list(self.shards)
+
+    def versioned(self, version):
+        """Same layout pointing at the `{index}_v{version}` generation"""
+        if not version:
+            return self
+
+        shards = [
+            {"url": s["url"], "index": f"{s['index']}_v{version}", "locations": s["locations"]}
+            for s in self.shards
+        ]
+        return ShardMap(shards, self.strategy)
+
+
+def load_shard_map(path=SHARD_CONFIG, endee_url=DEFAULT_ENDEE_URL, index_name=DEFAULT_INDEX_NAME):
+    """Reads the shard config; without one everything lives in a single index"""
+    if not os.path.exists(path):
+        return ShardMap([{"url": endee_url, "index": index_name}])
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    return ShardMap(config["shards"], config.get("strategy", "hash"))
+
+
+# ==========================
+# INDEX MANAGEMENT
+# ==========================
+def create_shard_indexes(shard_map: ShardMap, dim=384, space_type="cosine"):
+    """Creates one Endee index per shard, returns per-shard results"""
+    results = []
+    for shard in shard_map.shards:
+        payload = {
+            "index_name": shard["index"],
+            "dim": dim,
+            "space_type": space_type,
+        }
+        try:
+            res = requests.post(f"{shard['url']}/api/v1/index/create", json=payload, timeout=30)
+            results.append({"index": shard["index"], "url": shard["url"], "status_code": res.status_code, "response": res.text})
+        except Exception as e:
+            results.append({"index": shard["index"], "url": shard["url"], "status_code": None, "response": str(e)})
+    return results
+
+
+def drop_shard_indexes(shard_map: ShardMap):
+    """Deletes every shard index of this layout (best effort)"""
+    results = []
+    for shard in shard_map.shards:
+        try:
+            res = requests.delete(f"{shard['url']}/api/v1/index/{shard['index']}/delete", timeout=30)
+            results.append({"index": shard["index"], "status_code": res.status_code})
+        except Exception as e:
+            results.append({"index": shard["index"], "status_code": None, "error": str(e)})
+    return results
+
+
+# ==========================
+# INGEST
+# ==========================
+def _post_batches(shard, items, timeout):
+    url = f"{shard['url']}/api/v1/index/{shard['index']}/vector/insert"
+    inserted = 0
+
+    for start in range(0, len(items), INSERT_BATCH):
+        batch = items[start : start + INSERT_BATCH]
+        res = requests.post(url, json=batch, timeout=timeout)
+        if res.status_code != 200:
+            return {"index": shard["index"], "inserted": inserted, "error": res.text}
+        inserted += len(batch)
+
+    return {"index": shard["index"], "inserted": inserted}
+
+
+def insert_sharded(shard_map: ShardMap, payload: list, timeout=30):
+    """Routes Endee insert items to their shards and uploads them in parallel"""
+    routed = {}
+    for item in payload:
+        location = json.loads(item["filter"]).get("location")
+        shard = shard_map.shard_for(item["id"], location)
+        routed.setdefault(id(shard), (shard, []))[1].append(item)
+
+    def upload(entry):
+        shard, items = entry
+        try:
+            return _post_batches(shard, items, timeout)
+        except Exception as e:
+            return {"index": shard["index"], "inserted": 0, "error": str(e)}
+
+    return list(_insert_pool.map(upload, routed.values()))
+
+
+# ==========================
+# SEARCH (SCATTER-GATHER)
+# ==========================
+def _search_one(shard, payload, timeout):
+    res = requests.post(
+        f"{shard['url']}/api/v1/index/{shard['index']}/search",
+        json=payload,
+        timeout=timeout,
+    )
+    if res.status_code != 200:
+        raise RuntimeError(res.text)
+    return msgpack.unpackb(res.content, raw=False)
+
+
+def search_shards(shards: list, payload: dict, timeout=15):
+    """Searches shards concurrently and merges their top-k by score.
+
+    Returns (items, errors). Items keep Endee's [score, id, ...] layout, so
+    callers handle them exactly like a single-index result.
+    """
+    if not shards:
+        return [], []
+
+    if len(shards) == 1:
+        try:
+            return _search_one(shards[0], payload, timeout), []
+        except Exception as e:
+            return [], [f"{shards[0]['index']}: {e}"]
+
+    results = []
+    errors = []
+
+    futures = [(shard, _search_pool.submit(_search_one, shard, payload, timeout)) for shard in shards]
+    for shard, future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            errors.append(f"{shard['index']}: {e}")
+
+    merged = heapq.nlargest(
+        int(payload["k"]),
+        (item for shard_items in results for item in shard_items),
+        key=lambda item: float(item[0]),
+    )
+    return merged, errors
@@ -0,0 +1,94 @@
+"""Response bytes + serialization time per request at different k.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps) with orjson,
+with and without a field projection, plus gzip sizes:
+
+    python bench_responses.py --k 5 10 20 50 --fields job_id,title,score
+"""
+
+import argparse
+import gzip
+import json
+import time
+
+import orjson
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from backend.responses import parse_fields, project
+
+CSV_PATH = "data/jobs.csv"
+
+
+def sample_hits(df, k):
+    """Hits shaped like job_hits() output, catalog rows repeated up to k"""
+    rows = df.to_dict("records")
+    hits = []
+    for i in range(k):
+        row = rows[i % len(rows)]
+        hits.append(
+            {
+                "job_id": int(row["job_id"]),
+                "title": str(row["title"]),
+                "company": str(row["company"]),
+                "location": str(row["location"]),
+                "skills": str(row["skills"]),
+                "experience": str(row["experience"]),
+                "description": str(row["description"]),
+                "score": 0.9 - i * 0.001,
+            }
+        )
+    return hits
+
+
+def default_encode(hits):
+    # ✅ What FastAPI does for a returned list with JSONResponse
+    return json.dumps(jsonable_encoder(hits), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def orjson_encode(hits, fields=None):
+    return orjson.dumps(project(hits, fields))
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        body = fn()
+    return body, 1e6 * (time.perf_counter() - start) / repeats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response size / serialization benchmark")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20, 50])
+    parser.add_argument("--fields", default="job_id,title,score")
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    fields, error = parse_fields(args.fields)
+    if error:
+        raise SystemExit(error)
+
+    df = pd.read_csv(CSV_PATH)
+    rows = []
+
+    for k in args.k:
+        hits = sample_hits(df, k)
+        modes = {
+            "default_json": lambda: default_encode(hits),
+            "orjson": lambda: orjson_encode(hits),
+            f"orjson[{args.fields}]": lambda: orjson_encode(hits, fields),
+        }
+
+        for mode, fn in modes.items():
+            body, micros = timed(fn, args.repeats)
+            rows.append(
+                {
+                    "k": k,
+                    "mode": mode,
+                    "bytes": len(body),
+                    "gzip_bytes": len(gzip.compress(body)),
+                    "serialize_us": round(micros, 2),
+                }
+            )
+
+    print(pd.DataFrame(rows).to_string(index=False))
@@ -0,0 +1,65 @@
+"""Sanity check for query-time near-duplicate collapsing.
+
+Builds reposted variants of every catalog description (city / company suffix,
+one swapped word) and checks that they collapse onto the original, while the
+distinct description templates never collapse into each other:
+
+    python check_dedup.py
+"""
+
+import csv
+import itertools
+
+from backend.dedup import NEAR_DUPLICATE_SIMILARITY, collapse_near_duplicates, minhash, similarity
+
+CSV_PATH = "data/jobs.csv"
+
+
+def variants(row):
+    description = row["description"].rstrip(".")
+    words = description.split()
+    return [
+        f"{description}. Based in {row['location']}.",
+        f"{description}. Join {row['company']}.",
+        " ".join(words[:-1] + ["tasks"]) + ".",
+    ]
+
+
+def hit(job_id, description):
+    return {"job_id": job_id, "description": description}
+
+
+if __name__ == "__main__":
+    with open(CSV_PATH, "r", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    templates = {}
+    for row in rows:
+        templates.setdefault(row["description"], row)
+
+    failures = []
+
+    # ✅ Every repost variant collapses onto its original
+    lowest = 1.0
+    for description, row in templates.items():
+        hits = [hit(0, description)] + [hit(i, v) for i, v in enumerate(variants(row), start=1)]
+        kept = collapse_near_duplicates(hits)
+        lowest = min([lowest] + [similarity(minhash(description), minhash(h["description"])) for h in hits[1:]])
+        if len(kept) != 1:
+            failures.append(f"variants of {description!r} kept {len(kept)} hits")
+
+    # ✅ Distinct templates never collapse
+    highest = max(
+        (similarity(minhash(a), minhash(b)) for a, b in itertools.combinations(templates, 2)),
+        default=0.0,
+    )
+    kept = collapse_near_duplicates([hit(i, d) for i, d in enumerate(templates)])
+    if len(kept) != len(templates):
+        failures.append(f"{len(templates)} distinct templates collapsed to {len(kept)}")
+
+    print(f"threshold {NEAR_DUPLICATE_SIMILARITY}: lowest repost similarity {lowest:.2f}, highest across templates {highest:.2f}")
+
+    if failures:
+        raise SystemExit("❌ " + "\n❌ ".join(failures))
+
+    print(f"✅ {len(templates)} templates, reposts collapse, distinct templates kept apart")
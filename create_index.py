@@ -1,15 +1,16 @@
-import requests
+from backend.db import init_db
+from backend.reindex import active_version
+from backend.sharding import load_shard_map, create_shard_indexes
 
 ENDEE_URL = "http://localhost:8080"
 INDEX_NAME = "jobs_index"
 
-payload = {
-    "index_name": INDEX_NAME,
-    "dim": 384,
-    "space_type": "cosine"
-}
+# ✅ One index per shard (single jobs_index when no shards.json), for the
+# active index version; insert_jobs.py / POST /insert build new versions
+init_db()
+shard_map = load_shard_map(endee_url=ENDEE_URL, index_name=INDEX_NAME).versioned(active_version())
 
-res = requests.post(f"{ENDEE_URL}/api/v1/index/create", json=payload)
-
-print("Status:", res.status_code)
-print("Response:", res.text)
+for r in create_shard_indexes(shard_map, dim=384, space_type="cosine"):
+    print(f"[{r['index']} @ {r['url']}]")
+    print("Status:", r["status_code"])
+    print("Response:", r["response"])
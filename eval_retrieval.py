@@ -0,0 +1,215 @@
+"""Recall vs latency of Endee search against exact NumPy search.
+
+Encodes the catalog and queries exactly like search_jobs.py / the API, computes
+brute-force cosine top-k as ground truth, and queries Endee for every
+(k, over-fetch, filter) combination.
+
+    python eval_retrieval.py --k 5 10 20 --overfetch 0 50 100 --queries-file data/logged_queries.txt
+
+The queries file holds one query per line, or JSON lines like
+{"query": "...", "location": "Pune", "experience": "2-5"}.
+"""
+
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sentence_transformers import SentenceTransformer
+
+from backend.db import init_db
+from backend.dedup import job_text, encode_unique
+from backend.reindex import active_version
+from backend.sharding import load_shard_map, search_shards
+
+CSV_PATH = "data/jobs.csv"
+ENDEE_URL = "http://localhost:8080"
+INDEX_NAME = "jobs_index"
+
+# ✅ Same list as the Streamlit query dropdown
+STREAMLIT_QUERIES = [
+    "python backend developer",
+    "aws cloud engineer",
+    "data analyst",
+    "devops engineer",
+    "machine learning engineer",
+    "java developer",
+]
+
+# ✅ Jobs scoring within this of the k-th exact score count as correct hits,
+# so identical reposted texts (exact ties) don't look like misses
+TIE_EPSILON = 1e-5
+
+
+def load_queries(path=None):
+    queries = [{"query": q} for q in STREAMLIT_QUERIES]
+    if not path:
+        return queries
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            queries.append(json.loads(line) if line.startswith("{") else {"query": line})
+
+    return queries
+
+
+def normalize_filter(value, title=False):
+    """Same cleanup /search applies to location / experience"""
+    if not value or str(value).strip().lower() in ["", "string", "all"]:
+        return None
+    value = str(value).strip()
+    return value.title() if title else value
+
+
+def query_filters(query, i, locations, experiences):
+    """Filter combinations to evaluate for one query"""
+    location = normalize_filter(query.get("location"), title=True)
+    experience = normalize_filter(query.get("experience"))
+    if location or experience:
+        return [("logged", location, experience)]
+
+    # ✅ Rotate through catalog values so every location / band gets covered
+    loc = locations[i % len(locations)]
+    exp = experiences[i % len(experiences)]
+    return [
+        ("none", None, None),
+        ("location", loc, None),
+        ("experience", None, exp),
+        ("both", loc, exp),
+    ]
+
+
+def exact_scores(job_vectors, query_vector):
+    q = query_vector / np.linalg.norm(query_vector)
+    return job_vectors @ q
+
+
+def filter_mask(df, location, experience):
+    mask = np.ones(len(df), dtype=bool)
+    if location:
+        mask &= (df["location"] == location).to_numpy()
+    if experience:
+        mask &= (df["experience"] == experience).to_numpy()
+    return mask
+
+
+def endee_payload(query_vector, endee_k, location, experience):
+    """Same payload the /search endpoint sends"""
+    payload = {"vector": query_vector.tolist(), "k": endee_k}
+
+    filter_array = []
+    if location:
+        filter_array.append({"location": {"$eq": location}})
+    if experience:
+        filter_array.append({"experience": {"$eq": experience}})
+    if filter_array:
+        payload["filter"] = json.dumps(filter_array)
+
+    return payload
+
+
+def evaluate(df, job_vectors, queries, query_vectors, live_map, ks, overfetches, repeats):
+    locations = sorted(df["location"].unique().tolist())
+    experiences = sorted(df["experience"].unique().tolist())
+    position = {int(job_id): i for i, job_id in enumerate(df["job_id"])}
+
+    rows = []
+
+    for k, overfetch in itertools.product(ks, overfetches):
+        endee_k = max(k, overfetch) if overfetch else k
+        per_mode = {}
+
+        for i, (query, query_vector) in enumerate(zip(queries, query_vectors)):
+            scores = exact_scores(job_vectors, query_vector)
+
+            for mode, location, experience in query_filters(query, i, locations, experiences):
+                mask = filter_mask(df, location, experience)
+                matching = int(mask.sum())
+                expected = min(k, matching)
+
+                payload = endee_payload(query_vector, endee_k, location, experience)
+                shards = live_map.shards_for_query(location)
+                latencies = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    data, errors = search_shards(shards, payload)
+                    latencies.append(1000 * (time.perf_counter() - start))
+
+                if errors:
+                    raise RuntimeError(f"Endee search failed: {errors}")
+
+                hits = [position[int(item[1])] for item in data if int(item[1]) in position][:k]
+
+                stats = per_mode.setdefault(mode, {"recall": [], "fill": [], "latency": [], "zero_match": 0})
+                stats["latency"].extend(latencies)
+
+                # ✅ Nothing in the catalog matches: no ground truth, reported separately
+                if not expected:
+                    stats["zero_match"] += 1
+                    continue
+
+                kth = np.sort(scores[mask])[::-1][expected - 1]
+                correct = sum(1 for h in hits if mask[h] and scores[h] >= kth - TIE_EPSILON)
+                stats["recall"].append(min(correct, expected) / expected)
+                stats["fill"].append(min(len(hits), expected) / expected)
+
+        for mode, stats in per_mode.items():
+            rows.append(
+                {
+                    "k": k,
+                    "endee_k": endee_k,
+                    "filter": mode,
+                    "queries": len(stats["recall"]),
+                    "zero_match": stats["zero_match"],
+                    "recall@k": round(float(np.mean(stats["recall"])), 4) if stats["recall"] else None,
+                    "fill_rate": round(float(np.mean(stats["fill"])), 4) if stats["fill"] else None,
+                    "p50_ms": round(float(np.percentile(stats["latency"], 50)), 2),
+                    "p99_ms": round(float(np.percentile(stats["latency"], 99)), 2),
+                }
+            )
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Endee recall / latency evaluation")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--overfetch", type=int, nargs="+", default=[0, 50, 100], help="Endee k floor, 0 = no over-fetch")
+    parser.add_argument("--queries-file", default=None)
+    parser.add_argument("--repeats", type=int, default=5, help="Endee calls per query for latency")
+    parser.add_argument("--output", default=None, help="Write the report as CSV")
+    args = parser.parse_args()
+
+    df = pd.read_csv(CSV_PATH)
+
+    # ✅ Normalize like the API does
+    df["location"] = df["location"].astype(str).str.strip().str.title()
+    df["experience"] = df["experience"].astype(str).str.strip()
+
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+
+    texts = [job_text(row) for _, row in df.iterrows()]
+    vectors, _ = encode_unique(model, texts)
+    job_vectors = np.asarray(vectors, dtype=np.float32)
+    job_vectors /= np.linalg.norm(job_vectors, axis=1, keepdims=True)
+
+    queries = load_queries(args.queries_file)
+    query_vectors = np.asarray(model.encode([q["query"] for q in queries]), dtype=np.float32)
+
+    init_db()
+    shard_map = load_shard_map(endee_url=ENDEE_URL, index_name=INDEX_NAME)
+    live_map = shard_map.versioned(active_version())
+
+    report = evaluate(df, job_vectors, queries, query_vectors, live_map, args.k, args.overfetch, args.repeats)
+
+    print(f"\n✅ {len(queries)} queries, {len(df)} jobs, {len(live_map.shards)} shard(s)\n")
+    print(report.to_string(index=False))
+
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"\n✅ Report written to {args.output}")
@@ -1,22 +1,61 @@
 import streamlit as st
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 API_URL = "http://127.0.0.1:8000"
-CSV_PATH = "data/jobs.csv"
 
 st.set_page_config(page_title="Job AI Search System", layout="wide")
 
 st.title("💼 Job AI Search System")
 st.caption("Semantic Search + Filters + Apply Jobs + Resume Match + RAG (Endee + Ollama) ✅")
 
-# Load CSV for dropdown options
-df = pd.read_csv(CSV_PATH)
-df["location"] = df["location"].astype(str).str.strip().str.title()
-df["experience"] = df["experience"].astype(str).str.strip()
 
-locations = ["All"] + sorted(df["location"].unique().tolist())
-experiences = ["All"] + sorted(df["experience"].unique().tolist())
+@st.cache_resource
+def get_session():
+    """One pooled HTTP session shared across reruns"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+
+@st.cache_resource
+def etag_cache():
+    """path -> (etag, body) kept across reruns"""
+    return {}
+
+
+def get_cached(path):
+    """Conditional GET: reuses the cached body when the backend answers 304"""
+    cache = etag_cache()
+    headers = {}
+    if path in cache:
+        headers["If-None-Match"] = cache[path][0]
+
+    res = session.get(f"{API_URL}{path}", headers=headers, timeout=10)
+    if res.status_code == 304:
+        return cache[path][1]
+
+    res.raise_for_status()
+    body = res.json()
+
+    etag = res.headers.get("ETag")
+    if etag:
+        cache[path] = (etag, body)
+
+    return body
+
+
+session = get_session()
+
+# Dropdown options from backend facets (no CSV read on rerun)
+try:
+    facets = get_cached("/facets")["facets"]
+except Exception as e:
+    st.error(f"Could not load filters from backend: {e}")
+    facets = {"location": [], "experience": []}
+
+locations = ["All"] + [f["value"] for f in facets["location"]]
+experiences = ["All"] + [f["value"] for f in facets["experience"]]
 
 queries = [
     "python backend developer",
@@ -35,12 +74,35 @@ k = st.sidebar.slider("Top K Results", 1, 10, 5)
 
 st.sidebar.header("⚙ Admin Panel")
 if st.sidebar.button("📥 Insert Jobs to Endee"):
-    r = requests.post(f"{API_URL}/insert")
+    r = session.post(f"{API_URL}/insert")
     if r.status_code == 200:
-        st.sidebar.success("✅ Jobs inserted into Endee!")
+        out = r.json()
+        st.session_state["ingest_job"] = out.get("job_id")
+        if "error" in out:
+            st.sidebar.warning(out["error"])
+        else:
+            st.sidebar.success("✅ Re-index started in background")
     else:
         st.sidebar.error(r.text)
 
+# Background re-index progress (live index keeps serving meanwhile)
+if st.session_state.get("ingest_job"):
+    try:
+        job = session.get(f"{API_URL}/ingest/{st.session_state['ingest_job']}", timeout=5).json()
+        if "error" in job:
+            st.sidebar.error(job["error"])
+        else:
+            st.sidebar.progress(job["progress"], text=f"{job['state']} · {job['phase']} · {job['rows_per_second']} rows/s")
+            if job["state"] == "failed":
+                st.sidebar.error(job["error"])
+            elif job["state"] == "succeeded":
+                st.sidebar.success(f"✅ jobs_index v{job['version']} is live ({job['inserted']} jobs)")
+                del st.session_state["ingest_job"]
+            else:
+                st.sidebar.button("🔄 Refresh status")
+    except Exception as e:
+        st.sidebar.error(f"Ingest status failed: {e}")
+
 # Tabs
 tab1, tab2, tab3 = st.tabs(["🔎 Search Jobs", "📄 Resume Match", "🧠 RAG Assistant"])
 
@@ -58,7 +120,7 @@ with tab1:
         if selected_experience != "All":
             payload["experience"] = selected_experience
 
-        res = requests.post(f"{API_URL}/search", json=payload)
+        res = session.post(f"{API_URL}/search", json=payload)
 
         if res.status_code != 200:
             st.error(res.text)
@@ -77,7 +139,7 @@ with tab1:
                     st.write(job["description"])
 
                     if st.button(f"✅ Apply Job {job['job_id']}", key=f"apply_{job['job_id']}"):
-                        apply_res = requests.post(f"{API_URL}/apply", json={"job_id": job["job_id"]})
+                        apply_res = session.post(f"{API_URL}/apply", json={"job_id": job["job_id"]})
                         if apply_res.status_code == 200:
                             st.success(apply_res.json()["message"])
                             st.rerun()
@@ -97,7 +159,7 @@ with tab2:
             st.warning("Upload a PDF resume first.")
         else:
             files = {"file": (resume_file.name, resume_file.getvalue(), "application/pdf")}
-            res = requests.post(f"{API_URL}/resume-match?k={resume_k}", files=files)
+            res = session.post(f"{API_URL}/resume-match?k={resume_k}", files=files)
 
             if res.status_code != 200:
                 st.error(res.text)
@@ -123,8 +185,8 @@ with tab3:
     rag_k = st.slider("Top Jobs Context (RAG)", 1, 10, 5)
 
     if st.button("✨ Generate AI Answer (RAG)"):
-        payload = {"question": question, "k": rag_k}
-        res = requests.post(f"{API_URL}/rag", json=payload)
+        payload = {"question": question, "k": rag_k, "fields": "job_id,title,company,location,experience,score"}
+        res = session.post(f"{API_URL}/rag", json=payload)
 
         if res.status_code != 200:
             st.error(res.text)
@@ -135,7 +197,7 @@ with tab3:
             st.write(out.get("answer", ""))
 
             st.markdown("### 📌 Retrieved Jobs (Context)")
-            ctx = out.get("context", [])
+            ctx = out.get("context_jobs", [])
             if not ctx:
                 st.warning("No context jobs retrieved.")
             else:
@@ -147,31 +209,26 @@ st.divider()
 st.subheader("📌 Applied Jobs")
 
 try:
-    applied_res = requests.get(f"{API_URL}/applied")
+    applied_jobs = get_cached("/applied")
 
-    if applied_res.status_code == 200:
-        applied_jobs = applied_res.json()
-
-        if not applied_jobs:
-            st.info("No applied jobs yet.")
-        else:
-            st.success(f"✅ You applied to {len(applied_jobs)} jobs")
+    if not applied_jobs:
+        st.info("No applied jobs yet.")
+    else:
+        st.success(f"✅ You applied to {len(applied_jobs)} jobs")
 
-            for aj in applied_jobs:
-                st.markdown(f"✅ **{aj['title']}** ({aj['company']}) - {aj['location']} - {aj['experience']}")
-                st.caption(f"Applied at: {aj['applied_at']}")
+        for aj in applied_jobs:
+            st.markdown(f"✅ **{aj['title']}** ({aj['company']}) - {aj['location']} - {aj['experience']}")
+            st.caption(f"Applied at: {aj['applied_at']}")
 
-                if st.button(f"❌ Remove {aj['job_id']}", key=f"remove_{aj['job_id']}"):
-                    del_res = requests.delete(f"{API_URL}/applied/{aj['job_id']}")
-                    if del_res.status_code == 200:
-                        st.success("Removed ✅ Refreshing...")
-                        st.rerun()
-                    else:
-                        st.error(del_res.text)
+            if st.button(f"❌ Remove {aj['job_id']}", key=f"remove_{aj['job_id']}"):
+                del_res = session.delete(f"{API_URL}/applied/{aj['job_id']}")
+                if del_res.status_code == 200:
+                    st.success("Removed ✅ Refreshing...")
+                    st.rerun()
+                else:
+                    st.error(del_res.text)
 
-                st.markdown("---")
-    else:
-        st.error(applied_res.text)
+            st.markdown("---")
 
 except Exception as e:
     st.error(f"Backend not running: {e}")
@@ -1,45 +1,40 @@
 import pandas as pd
-import requests
-import json
 from sentence_transformers import SentenceTransformer
 
+from backend.db import init_db
+from backend.reindex import start_reindex, job_status
+from backend.sharding import load_shard_map
+
 CSV_PATH = "data/jobs.csv"
 ENDEE_URL = "http://localhost:8080"
 INDEX_NAME = "jobs_index"
 
+init_db()
+
 df = pd.read_csv(CSV_PATH)
+
+# ✅ Normalize like the API does
+df["location"] = df["location"].astype(str).str.strip().str.title()
+df["experience"] = df["experience"].astype(str).str.strip()
+
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
-payload = []
-
-for _, row in df.iterrows():
-    text = f"{row['title']} {row['skills']} {row['description']}"
-    embedding = model.encode(text).tolist()
-
-    payload.append({
-        "id": str(row["job_id"]),
-        "vector": embedding,
-        "meta": {
-            "title": str(row["title"]),
-            "company": str(row["company"]),
-            "location": str(row["location"]),
-            "skills": str(row["skills"]),
-            "experience": str(row["experience"]),
-            "description": str(row["description"])
-        },
-
-        # ✅ filter must be STRING JSON
-        "filter": json.dumps({
-            "location": str(row["location"]).strip().lower(),
-            "experience": str(row["experience"]).strip().lower()
-        })
-    })
-
-res = requests.post(
-    f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/vector/insert",
-    json=payload
-)
-
-print("Status:", res.status_code)
-print("Response:", res.text)
-print("Inserted vectors:", len(payload))
+# ✅ Same blue/green build as POST /insert: fills jobs_index_v{n}, then swaps
+# the active version, so the API and search_jobs.py pick it up
+shard_map = load_shard_map(endee_url=ENDEE_URL, index_name=INDEX_NAME)
+job_id, error = start_reindex(df, model, shard_map, background=False)
+
+if error:
+    print("Error:", error, f"(job {job_id})")
+    exit()
+
+job = job_status(job_id)
+
+print("Job:", job_id, "->", job["state"])
+if job["error"]:
+    print("Error:", job["error"])
+
+print("Index version:", job["version"])
+print("Inserted vectors:", job["inserted"])
+print("Encodes saved (duplicate texts):", job["encodes_saved"])
+print("Rows/s:", job["rows_per_second"])
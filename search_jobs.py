@@ -1,9 +1,11 @@
 import pandas as pd
-import requests
-import msgpack
 import json
 from sentence_transformers import SentenceTransformer
 
+from backend.db import init_db
+from backend.reindex import active_version
+from backend.sharding import load_shard_map, search_shards
+
 CSV_PATH = "data/jobs.csv"
 ENDEE_URL = "http://localhost:8080"
 INDEX_NAME = "jobs_index"
@@ -26,16 +28,17 @@ payload = {
     "k": 50  # ✅ keep 10 for better filter chance
 }
 
-res = requests.post(f"{ENDEE_URL}/api/v1/index/{INDEX_NAME}/search", json=payload)
+# ✅ Search the index version the API is serving
+init_db()
+shard_map = load_shard_map(endee_url=ENDEE_URL, index_name=INDEX_NAME).versioned(active_version())
+data, errors = search_shards(shard_map.shards_for_query(location), payload)
 
-print("\nStatus:", res.status_code)
+if errors:
+    print("\nErrors:", errors)
 
-if res.status_code != 200:
-    print("Error:", res.text)
+if errors and not data:
     exit()
 
-data = msgpack.unpackb(res.content, raw=False)
-
 print("\n✅ Raw Results from Endee:", len(data))
 
 # ✅ Manual Filtering in Python (100% Reliable)